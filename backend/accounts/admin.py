@@ -61,6 +61,10 @@ class AuditLogAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'description', 'ip_address']
     readonly_fields = ['user', 'action', 'description', 'ip_address', 'user_agent', 'timestamp', 'metadata']
     ordering = ['-timestamp']
+    list_select_related = ('user',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
     
     def has_add_permission(self, request):
         return False  # Audit logs should only be created programmatically
@@ -0,0 +1,34 @@
+"""
+Authentication classes for accounts app
+"""
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+def authenticate_request_jwt(request):
+    """
+    Authenticate the bearer token on a Django request ahead of DRF
+    Keeps a successful result on the request for RequestCachedJWTAuthentication;
+    returns None for a missing or invalid token
+    """
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    request._jwt_auth_result = result
+    return result
+
+
+class RequestCachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reuses the result the accounts middlewares already
+    computed for this request instead of decoding the token and loading the
+    user a second time
+    """
+    def authenticate(self, request):
+        # Attribute lookups on DRF's Request fall through to the Django request
+        cached = getattr(request, '_jwt_auth_result', None)
+        if cached is not None:
+            return cached
+        # Invalid tokens are not cached, so DRF still reports the real error
+        return super().authenticate(request)
@@ -1,9 +1,12 @@
 """
 Management command to check admin access and diagnose issues
 """
+from collections import defaultdict
 from django.core.management.base import BaseCommand
+from django.db.models import Count
 from accounts.models import User, Organization
-from facilities.models import Location, Tank, Permit
+from facilities.models import Location, Tank
+from permits.models import Permit
 from permissions.models import Permission, RolePermission
 
 
@@ -19,104 +22,106 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        username = options['username']
+        lines = []
+        # Flush whatever was collected even if a check raises, so the report
+        # still shows how far it got
+        try:
+            self.check_access(options['username'], lines)
+        finally:
+            self.stdout.write('\n'.join(lines))
 
-        self.stdout.write(self.style.SUCCESS(f'\n🔍 Checking access for: {username}\n'))
+    def check_access(self, username, lines):
+        """Build the access report for username, appending it to lines"""
+        lines.append(self.style.SUCCESS(f'\n🔍 Checking access for: {username}\n'))
 
         try:
             user = User.objects.get(username=username)
         except User.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'❌ User "{username}" not found!'))
-            self.stdout.write('\n💡 Create admin user with: python manage.py setup_admin')
+            lines.append(self.style.ERROR(f'❌ User "{username}" not found!'))
+            lines.append('\n💡 Create admin user with: python manage.py setup_admin')
             return
 
         # User Information
-        self.stdout.write(self.style.SUCCESS('👤 USER INFORMATION:'))
-        self.stdout.write(f'   Username: {user.username}')
-        self.stdout.write(f'   Email: {user.email}')
-        self.stdout.write(f'   Role: {user.get_role_display()}')
-        self.stdout.write(f'   Is Active: {user.is_active} {"✓" if user.is_active else "✗"}')
-        self.stdout.write(f'   Is Staff: {user.is_staff} {"✓" if user.is_staff else "✗"}')
-        self.stdout.write(f'   Is Superuser: {user.is_superuser} {"✓" if user.is_superuser else "✗"}')
+        lines.append(self.style.SUCCESS('👤 USER INFORMATION:'))
+        lines.append(f'   Username: {user.username}')
+        lines.append(f'   Email: {user.email}')
+        lines.append(f'   Role: {user.get_role_display()}')
+        lines.append(f'   Is Active: {user.is_active} {"✓" if user.is_active else "✗"}')
+        lines.append(f'   Is Staff: {user.is_staff} {"✓" if user.is_staff else "✗"}')
+        lines.append(f'   Is Superuser: {user.is_superuser} {"✓" if user.is_superuser else "✗"}')
 
         # Organization
-        self.stdout.write(self.style.SUCCESS('\n🏢 ORGANIZATION:'))
+        lines.append(self.style.SUCCESS('\n🏢 ORGANIZATION:'))
         if user.organization:
-            self.stdout.write(f'   ✓ Organization: {user.organization.name}')
-            self.stdout.write(f'   ✓ Organization ID: {user.organization.id}')
+            lines.append(f'   ✓ Organization: {user.organization.name}')
+            lines.append(f'   ✓ Organization ID: {user.organization.id}')
         else:
-            self.stdout.write(self.style.ERROR('   ✗ No organization assigned!'))
-            self.stdout.write('   💡 Fix: Run python manage.py setup_admin')
+            lines.append(self.style.ERROR('   ✗ No organization assigned!'))
+            lines.append('   💡 Fix: Run python manage.py setup_admin')
 
         # Permissions
-        self.stdout.write(self.style.SUCCESS('\n🔑 PERMISSIONS:'))
+        lines.append(self.style.SUCCESS('\n🔑 PERMISSIONS:'))
         permissions = user.get_permissions()
         if permissions:
-            self.stdout.write(f'   ✓ Total Permissions: {len(permissions)}')
+            lines.append(f'   ✓ Total Permissions: {len(permissions)}')
 
             # Group by category
-            categories = {}
+            categories = defaultdict(list)
             for perm_code in permissions:
-                category = perm_code.split(':')[0]
-                if category not in categories:
-                    categories[category] = []
-                categories[category].append(perm_code)
+                categories[perm_code.split(':', 1)[0]].append(perm_code)
 
             for category, perms in sorted(categories.items()):
-                self.stdout.write(f'\n   {category.upper()}:')
+                lines.append(f'\n   {category.upper()}:')
                 for perm in sorted(perms):
-                    self.stdout.write(f'     • {perm}')
+                    lines.append(f'     • {perm}')
         else:
-            self.stdout.write(self.style.ERROR('   ✗ No permissions found!'))
-            self.stdout.write('   💡 Fix: Run python manage.py seed_rbac')
+            lines.append(self.style.ERROR('   ✗ No permissions found!'))
+            lines.append('   💡 Fix: Run python manage.py seed_rbac')
 
         # Data Access
-        self.stdout.write(self.style.SUCCESS('\n📊 DATA ACCESS:'))
+        lines.append(self.style.SUCCESS('\n📊 DATA ACCESS:'))
 
-        # Check locations
-        if user.organization:
-            locations = Location.objects.filter(organization=user.organization, is_active=True)
-        else:
-            locations = Location.objects.filter(is_active=True)
+        # Check locations (locations are not scoped to an organization)
+        locations = Location.objects.filter(is_active=True)
 
         location_count = locations.count()
-        self.stdout.write(f'   Accessible Locations: {location_count}')
+        lines.append(f'   Accessible Locations: {location_count}')
 
         if location_count > 0:
-            self.stdout.write('   Recent Locations:')
-            for loc in locations[:5]:
-                tank_count = Tank.objects.filter(location=loc).count()
-                permit_count = Permit.objects.filter(location=loc).count()
-                self.stdout.write(
-                    f'     • {loc.name} (Tanks: {tank_count}, Permits: {permit_count})'
+            lines.append('   Recent Locations:')
+            recent_locations = locations.only('id', 'name').annotate(
+                tank_count=Count('tanks', distinct=True),
+                permit_count=Count('facility_permits', distinct=True)
+            )[:5]
+            for loc in recent_locations:
+                lines.append(
+                    f'     • {loc.name} (Tanks: {loc.tank_count}, Permits: {loc.permit_count})'
                 )
         else:
-            self.stdout.write(self.style.WARNING('   ⚠ No locations found!'))
-            self.stdout.write('   💡 Fix: Run python manage.py setup_admin --create-sample-data')
+            lines.append(self.style.WARNING('   ⚠ No locations found!'))
+            lines.append('   💡 Fix: Run python manage.py setup_admin --create-sample-data')
 
         # Total counts
         total_tanks = Tank.objects.count()
         total_permits = Permit.objects.count()
         total_orgs = Organization.objects.count()
 
-        self.stdout.write(f'\n   Total Tanks: {total_tanks}')
-        self.stdout.write(f'   Total Permits: {total_permits}')
-        self.stdout.write(f'   Total Organizations: {total_orgs}')
+        lines.append(f'\n   Total Tanks: {total_tanks}')
+        lines.append(f'   Total Permits: {total_permits}')
+        lines.append(f'   Total Organizations: {total_orgs}')
 
         # Dashboard stats
-        self.stdout.write(self.style.SUCCESS('\n📈 DASHBOARD STATS:'))
-        if user.organization:
-            org_locations = Location.objects.filter(organization=user.organization, is_active=True).count()
-            self.stdout.write(f'   Organization Locations: {org_locations}')
+        lines.append(self.style.SUCCESS('\n📈 DASHBOARD STATS:'))
+        lines.append(f'   Active Locations: {location_count}')
 
         active_tanks = Tank.objects.filter(status='active').count()
-        self.stdout.write(f'   Active Tanks: {active_tanks}')
+        lines.append(f'   Active Tanks: {active_tanks}')
 
         from django.utils import timezone
         expiring_permits = Permit.objects.filter(
             expiry_date__lte=timezone.now().date() + timezone.timedelta(days=30)
         ).count()
-        self.stdout.write(f'   Expiring Permits (30 days): {expiring_permits}')
+        lines.append(f'   Expiring Permits (30 days): {expiring_permits}')
 
         # Issues Summary
         issues = []
@@ -132,19 +137,19 @@ class Command(BaseCommand):
             issues.append('No accessible locations')
 
         if issues:
-            self.stdout.write(self.style.ERROR('\n❌ ISSUES FOUND:'))
+            lines.append(self.style.ERROR('\n❌ ISSUES FOUND:'))
             for issue in issues:
-                self.stdout.write(f'   • {issue}')
-            self.stdout.write(self.style.WARNING('\n💡 FIX ALL ISSUES:'))
-            self.stdout.write('   python manage.py setup_admin --create-sample-data')
+                lines.append(f'   • {issue}')
+            lines.append(self.style.WARNING('\n💡 FIX ALL ISSUES:'))
+            lines.append('   python manage.py setup_admin --create-sample-data')
         else:
-            self.stdout.write(self.style.SUCCESS('\n✅ No issues found! Admin has full access.'))
+            lines.append(self.style.SUCCESS('\n✅ No issues found! Admin has full access.'))
 
         # Quick fix commands
-        self.stdout.write(self.style.SUCCESS('\n🔧 QUICK FIX COMMANDS:'))
-        self.stdout.write('   Setup admin with sample data:')
-        self.stdout.write('   → python manage.py setup_admin --create-sample-data')
-        self.stdout.write('\n   Just seed permissions:')
-        self.stdout.write('   → python manage.py seed_rbac')
-        self.stdout.write('\n   Check specific user:')
-        self.stdout.write('   → python manage.py check_admin_access --username=youruser')
+        lines.append(self.style.SUCCESS('\n🔧 QUICK FIX COMMANDS:'))
+        lines.append('   Setup admin with sample data:')
+        lines.append('   → python manage.py setup_admin --create-sample-data')
+        lines.append('\n   Just seed permissions:')
+        lines.append('   → python manage.py seed_rbac')
+        lines.append('\n   Check specific user:')
+        lines.append('   → python manage.py check_admin_access --username=youruser')
@@ -5,48 +5,61 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.db import connection
+from django.db.models import Count, Q
 from facilities.models import Location, DashboardSection
 from permissions.models import Permission, PermissionCategory
 import sys
 
-User = get_user_model()
-
 
 class Command(BaseCommand):
     help = 'Check backend setup and configuration'
     
     def handle(self, *args, **options):
-        self.stdout.write(self.style.SUCCESS('🔍 Backend Setup Check'))
-        self.stdout.write('=' * 60)
+        lines = []
+        # Flush whatever was collected even if a check raises, so the report
+        # still shows how far it got
+        try:
+            self.run_checks(lines)
+        finally:
+            self.stdout.write('\n'.join(lines))
+    
+    def run_checks(self, lines):
+        """Run every check, appending the report to lines"""
+        lines.append(self.style.SUCCESS('🔍 Backend Setup Check'))
+        lines.append('=' * 60)
         
         # Check database connection
-        self.check_database()
-        
-        # Check models and migrations
-        self.check_models()
-        
-        # Check users
-        self.check_users()
-        
-        # Check permissions
-        self.check_permissions()
+        db_ok = self.check_database(lines)
         
-        # Check dashboard sections
-        self.check_dashboard_sections()
+        # Skip the ORM checks when the database is unreachable
+        if db_ok:
+            # Check models and migrations
+            self.check_models(lines)
+            
+            # Check users
+            self.check_users(lines)
+            
+            # Check permissions
+            self.check_permissions(lines)
+            
+            # Check dashboard sections
+            self.check_dashboard_sections(lines)
+        else:
+            lines.append('\n⚠️  Skipping model, user, permission and dashboard checks (database unavailable)')
         
         # Check settings
-        self.check_settings()
+        self.check_settings(lines)
         
-        self.stdout.write('\n' + '=' * 60)
-        self.stdout.write(self.style.SUCCESS('✅ Setup check complete!'))
+        lines.append('\n' + '=' * 60)
+        lines.append(self.style.SUCCESS('✅ Setup check complete!'))
     
-    def check_database(self):
-        """Check database connection and tables"""
-        self.stdout.write('\n📊 Database Check:')
+    def check_database(self, lines):
+        """Check database connection and tables; returns False if the database is unreachable"""
+        lines.append('\n📊 Database Check:')
         try:
             with connection.cursor() as cursor:
                 cursor.execute("SELECT 1")
-            self.stdout.write('  ✅ Database connection: OK')
+            lines.append('  ✅ Database connection: OK')
             
             # Check if tables exist
             table_names = connection.introspection.table_names()
@@ -54,107 +67,128 @@ class Command(BaseCommand):
             
             for table in required_tables:
                 if table in table_names:
-                    self.stdout.write(f'  ✅ Table {table}: EXISTS')
+                    lines.append(f'  ✅ Table {table}: EXISTS')
                 else:
-                    self.stdout.write(f'  ❌ Table {table}: MISSING')
+                    lines.append(f'  ❌ Table {table}: MISSING')
                     
         except Exception as e:
-            self.stdout.write(f'  ❌ Database error: {e}')
+            lines.append(f'  ❌ Database error: {e}')
+            return False
+        
+        return True
     
-    def check_models(self):
+    def check_models(self, lines):
         """Check model counts"""
-        self.stdout.write('\n📋 Models Check:')
+        User = get_user_model()
+        lines.append('\n📋 Models Check:')
         try:
-            user_count = User.objects.count()
-            location_count = Location.objects.count()
-            permission_count = Permission.objects.count()
+            user_count, location_count, permission_count = self._count_rows(User, Location, Permission)
             
-            self.stdout.write(f'  📊 Users: {user_count}')
-            self.stdout.write(f'  📊 Locations: {location_count}')
-            self.stdout.write(f'  📊 Permissions: {permission_count}')
+            lines.append(f'  📊 Users: {user_count}')
+            lines.append(f'  📊 Locations: {location_count}')
+            lines.append(f'  📊 Permissions: {permission_count}')
             
         except Exception as e:
-            self.stdout.write(f'  ❌ Model check error: {e}')
+            lines.append(f'  ❌ Model check error: {e}')
     
-    def check_users(self):
+    def check_users(self, lines):
         """Check user accounts"""
-        self.stdout.write('\n👥 Users Check:')
+        User = get_user_model()
+        lines.append('\n👥 Users Check:')
         try:
-            total_users = User.objects.count()
-            admin_users = User.objects.filter(role='admin').count()
-            active_users = User.objects.filter(is_active=True).count()
+            counts = User.objects.aggregate(
+                total=Count('id'),
+                admins=Count('id', filter=Q(role='admin')),
+                active=Count('id', filter=Q(is_active=True)),
+            )
+            total_users = counts['total']
+            admin_users = counts['admins']
+            active_users = counts['active']
             
-            self.stdout.write(f'  📊 Total users: {total_users}')
-            self.stdout.write(f'  👑 Admin users: {admin_users}')
-            self.stdout.write(f'  ✅ Active users: {active_users}')
+            lines.append(f'  📊 Total users: {total_users}')
+            lines.append(f'  👑 Admin users: {admin_users}')
+            lines.append(f'  ✅ Active users: {active_users}')
             
             if admin_users == 0:
-                self.stdout.write('  ⚠️  No admin users found!')
-                self.stdout.write('     💡 Create one: python manage.py create_admin_user')
+                lines.append('  ⚠️  No admin users found!')
+                lines.append('     💡 Create one: python manage.py create_admin_user')
             
         except Exception as e:
-            self.stdout.write(f'  ❌ Users check error: {e}')
+            lines.append(f'  ❌ Users check error: {e}')
     
-    def check_permissions(self):
+    def check_permissions(self, lines):
         """Check permissions setup"""
-        self.stdout.write('\n🔐 Permissions Check:')
+        lines.append('\n🔐 Permissions Check:')
         try:
-            categories = PermissionCategory.objects.count()
-            permissions = Permission.objects.count()
+            categories, permissions = self._count_rows(PermissionCategory, Permission)
             
-            self.stdout.write(f'  📊 Permission categories: {categories}')
-            self.stdout.write(f'  📊 Permissions: {permissions}')
+            lines.append(f'  📊 Permission categories: {categories}')
+            lines.append(f'  📊 Permissions: {permissions}')
             
             if permissions == 0:
-                self.stdout.write('  ⚠️  No permissions found!')
-                self.stdout.write('     💡 Create them: python manage.py create_default_permissions')
+                lines.append('  ⚠️  No permissions found!')
+                lines.append('     💡 Create them: python manage.py create_default_permissions')
             
         except Exception as e:
-            self.stdout.write(f'  ❌ Permissions check error: {e}')
+            lines.append(f'  ❌ Permissions check error: {e}')
     
-    def check_dashboard_sections(self):
+    def check_dashboard_sections(self, lines):
         """Check dashboard sections"""
-        self.stdout.write('\n📊 Dashboard Sections Check:')
+        lines.append('\n📊 Dashboard Sections Check:')
         try:
-            sections = DashboardSection.objects.count()
-            active_sections = DashboardSection.objects.filter(is_active=True).count()
+            counts = DashboardSection.objects.aggregate(
+                total=Count('id'),
+                active=Count('id', filter=Q(is_active=True)),
+            )
+            sections = counts['total']
+            active_sections = counts['active']
             
-            self.stdout.write(f'  📊 Total sections: {sections}')
-            self.stdout.write(f'  ✅ Active sections: {active_sections}')
+            lines.append(f'  📊 Total sections: {sections}')
+            lines.append(f'  ✅ Active sections: {active_sections}')
             
             if sections == 0:
-                self.stdout.write('  ⚠️  No dashboard sections found!')
-                self.stdout.write('     💡 Create them: python manage.py create_dashboard_sections')
+                lines.append('  ⚠️  No dashboard sections found!')
+                lines.append('     💡 Create them: python manage.py create_dashboard_sections')
             
         except Exception as e:
-            self.stdout.write(f'  ❌ Dashboard sections check error: {e}')
+            lines.append(f'  ❌ Dashboard sections check error: {e}')
+    
+    def _count_rows(self, *models):
+        """Count rows of several models in a single round-trip"""
+        subqueries = ', '.join(
+            f'(SELECT COUNT(*) FROM {connection.ops.quote_name(model._meta.db_table)})'
+            for model in models
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {subqueries}')
+            return cursor.fetchone()
     
-    def check_settings(self):
+    def check_settings(self, lines):
         """Check Django settings"""
-        self.stdout.write('\n⚙️  Settings Check:')
+        lines.append('\n⚙️  Settings Check:')
         
         # Check DEBUG mode
         debug_status = "ON" if settings.DEBUG else "OFF"
-        self.stdout.write(f'  🔧 DEBUG mode: {debug_status}')
+        lines.append(f'  🔧 DEBUG mode: {debug_status}')
         
         # Check database
         db_engine = settings.DATABASES['default']['ENGINE']
-        self.stdout.write(f'  🗄️  Database engine: {db_engine.split(".")[-1]}')
+        lines.append(f'  🗄️  Database engine: {db_engine.split(".")[-1]}')
         
         # Check secret key
         if settings.SECRET_KEY == 'django-insecure-development-key-change-in-production':
-            self.stdout.write('  ⚠️  Using default SECRET_KEY (change for production)')
+            lines.append('  ⚠️  Using default SECRET_KEY (change for production)')
         else:
-            self.stdout.write('  ✅ Custom SECRET_KEY configured')
+            lines.append('  ✅ Custom SECRET_KEY configured')
         
         # Check CORS
         cors_origins = getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
-        self.stdout.write(f'  🌐 CORS origins: {len(cors_origins)} configured')
+        lines.append(f'  🌐 CORS origins: {len(cors_origins)} configured')
         
         # Check installed apps
         required_apps = ['accounts', 'facilities', 'permissions', 'security']
         for app in required_apps:
             if app in settings.INSTALLED_APPS:
-                self.stdout.write(f'  ✅ App {app}: INSTALLED')
+                lines.append(f'  ✅ App {app}: INSTALLED')
             else:
-                self.stdout.write(f'  ❌ App {app}: MISSING')
\ No newline at end of file
+                lines.append(f'  ❌ App {app}: MISSING')
@@ -5,10 +5,12 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from accounts.utils import log_security_event
 import getpass
+import re
 
-User = get_user_model()
+_EMAIL_RE = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
 
 
 class Command(BaseCommand):
@@ -78,9 +80,7 @@ class Command(BaseCommand):
                 continue
             
             if validate_email and value:
-                import re
-                email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-                if not re.match(email_pattern, value):
+                if not _EMAIL_RE.match(value):
                     self.stdout.write(self.style.ERROR('Please enter a valid email address.'))
                     continue
             
@@ -107,23 +107,19 @@ class Command(BaseCommand):
                 self.stdout.write('')
     
     def validate_inputs(self, username, email, password):
-        """Validate all inputs before user creation"""
+        """Validate all inputs before user creation (password is validated in get_password)"""
+        User = get_user_model()
         errors = []
         
-        # Check if username exists
-        if User.objects.filter(username=username).exists():
+        # Check for existing username/email in a single query
+        collisions = list(
+            User.objects.filter(Q(username=username) | Q(email=email)).values_list('username', 'email')
+        )
+        if any(existing_username == username for existing_username, _ in collisions):
             errors.append(f'Username "{username}" already exists.')
-        
-        # Check if email exists
-        if User.objects.filter(email=email).exists():
+        if any(existing_email == email for _, existing_email in collisions):
             errors.append(f'Email "{email}" is already in use.')
         
-        # Validate password
-        try:
-            validate_password(password)
-        except ValidationError as e:
-            errors.extend(e.messages)
-        
         if errors:
             self.stdout.write(self.style.ERROR('\n❌ Validation errors:'))
             for error in errors:
@@ -134,6 +130,7 @@ class Command(BaseCommand):
     
     def create_admin_user(self, username, email, password, first_name, last_name):
         """Create admin user"""
+        User = get_user_model()
         user = User.objects.create_user(
             username=username,
             email=email,
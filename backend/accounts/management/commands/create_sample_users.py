@@ -3,10 +3,47 @@ Management command to create sample users for testing
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from accounts.utils import log_security_event
+from django.db.models import Q
+from accounts.models import Organization
+from accounts.signals import ensure_admin_permissions
+from accounts.utils import build_security_event, bulk_log_security_events
 
-User = get_user_model()
+_SAMPLE_USERS = [
+    {
+        'username': 'admin',
+        'email': 'admin@facility.com',
+        'password': 'SecureAdmin123!',
+        'first_name': 'Admin',
+        'last_name': 'User',
+        'role': 'admin',
+        'is_staff': True,
+        'is_superuser': True,
+    },
+    {
+        'username': 'operator',
+        'email': 'operator@facility.com',
+        'password': 'SecureOp123!',
+        'first_name': 'Operator',
+        'last_name': 'User',
+        'role': 'contributor',
+        'is_staff': False,
+        'is_superuser': False,
+    },
+    {
+        'username': 'viewer',
+        'email': 'viewer@facility.com',
+        'password': 'SecureView123!',
+        'first_name': 'Viewer',
+        'last_name': 'User',
+        'role': 'viewer',
+        'is_staff': False,
+        'is_superuser': False,
+    }
+]
+
+_SAMPLE_PASSWORDS = {u['username']: u['password'] for u in _SAMPLE_USERS}
 
 
 class Command(BaseCommand):
@@ -27,106 +64,102 @@ class Command(BaseCommand):
     
     def reset_sample_users(self):
         """Delete existing sample users"""
-        sample_emails = [
-            'admin@facility.com',
-            'operator@facility.com', 
-            'viewer@facility.com'
-        ]
+        User = get_user_model()
+        sample_emails = [u['email'] for u in _SAMPLE_USERS]
+        
+        sample_qs = User.objects.filter(email__in=sample_emails)
+        deleted_usernames = list(sample_qs.values_list('username', flat=True))
+        if deleted_usernames:
+            sample_qs.delete()
+        
+        for username in deleted_usernames:
+            self.stdout.write(f"Deleted user: {username}")
         
-        deleted_count = 0
-        for email in sample_emails:
-            try:
-                user = User.objects.get(email=email)
-                user.delete()
-                deleted_count += 1
-                self.stdout.write(f"Deleted user: {user.username}")
-            except User.DoesNotExist:
-                pass
+        deleted_count = len(deleted_usernames)
         
         if deleted_count > 0:
             self.stdout.write(self.style.SUCCESS(f'Deleted {deleted_count} sample users'))
     
     def create_sample_users(self):
         """Create sample users for testing"""
-        sample_users = [
-            {
-                'username': 'admin',
-                'email': 'admin@facility.com',
-                'password': 'SecureAdmin123!',
-                'first_name': 'Admin',
-                'last_name': 'User',
-                'role': 'admin',
-                'is_staff': True,
-                'is_superuser': True,
-            },
-            {
-                'username': 'operator',
-                'email': 'operator@facility.com',
-                'password': 'SecureOp123!',
-                'first_name': 'Operator',
-                'last_name': 'User',
-                'role': 'contributor',
-                'is_staff': False,
-                'is_superuser': False,
-            },
-            {
-                'username': 'viewer',
-                'email': 'viewer@facility.com',
-                'password': 'SecureView123!',
-                'first_name': 'Viewer',
-                'last_name': 'User',
-                'role': 'viewer',
-                'is_staff': False,
-                'is_superuser': False,
-            }
-        ]
+        User = get_user_model()
+        usernames = [u['username'] for u in _SAMPLE_USERS]
+        emails = [u['email'] for u in _SAMPLE_USERS]
+        existing = User.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails)
+        ).values_list('username', 'email')
+        existing_usernames = {username for username, _ in existing}
+        existing_emails = {email for _, email in existing}
         
-        created_count = 0
+        to_create = []
+        for user_data in _SAMPLE_USERS:
+            username = user_data['username']
+            email = user_data['email']
+            
+            # Check if user already exists
+            if username in existing_usernames:
+                self.stdout.write(f"User '{username}' already exists, skipping...")
+                continue
+            
+            if email in existing_emails:
+                self.stdout.write(f"Email '{email}' already exists, skipping...")
+                continue
+            
+            # Hash in memory so the whole batch goes out in one INSERT
+            to_create.append(User(
+                **{**user_data, 'password': make_password(user_data['password'])},
+                is_active=True
+            ))
         
-        with transaction.atomic():
-            for user_data in sample_users:
-                username = user_data['username']
-                email = user_data['email']
-                
-                # Check if user already exists
-                if User.objects.filter(username=username).exists():
-                    self.stdout.write(f"User '{username}' already exists, skipping...")
-                    continue
+        created_users = []
+        try:
+            with transaction.atomic():
+                # ignore_conflicts turns a concurrent duplicate into a no-op rather than
+                # an IntegrityError, but leaves the returned instances without a pk.
+                # Note which usernames already exist right before the insert and
+                # re-read only the rest, so rows from a concurrent or earlier partial
+                # run are not reported (or set up) as created here
+                pending_usernames = {u.username for u in to_create}
+                preexisting = set(
+                    User.objects.filter(username__in=pending_usernames).values_list('username', flat=True)
+                )
+                User.objects.bulk_create(to_create, batch_size=100, ignore_conflicts=True)
+                created_users = list(
+                    User.objects.filter(username__in=pending_usernames - preexisting).order_by('pk')
+                )
                 
-                if User.objects.filter(email=email).exists():
-                    self.stdout.write(f"Email '{email}' already exists, skipping...")
-                    continue
+                # bulk_create bypasses post_save, so apply the admin defaults from
+                # accounts.signals.user_post_save explicitly
+                admin_pks = [user.pk for user in created_users if user.role == 'admin']
+                if admin_pks:
+                    default_org = Organization.objects.filter(is_active=True).first()
+                    if default_org:
+                        User.objects.filter(pk__in=admin_pks, organization__isnull=True).update(
+                            organization=default_org
+                        )
+                    ensure_admin_permissions()
                 
-                # Create user
-                try:
-                    user = User.objects.create_user(
-                        username=user_data['username'],
-                        email=user_data['email'],
-                        password=user_data['password'],
-                        first_name=user_data['first_name'],
-                        last_name=user_data['last_name'],
-                        role=user_data['role'],
-                        is_staff=user_data['is_staff'],
-                        is_superuser=user_data['is_superuser'],
-                        is_active=True
-                    )
-                    
-                    created_count += 1
-                    self.stdout.write(f"✅ Created user: {username} ({user.get_role_display()})")
-                    
-                    # Log user creation
-                    log_security_event(
+                # Log user creation
+                bulk_log_security_events([
+                    build_security_event(
                         user=user,
                         action='user_created',
-                        description=f'Sample user created via management command: {username}',
+                        description=f'Sample user created via management command: {user.username}',
                         metadata={
                             'created_by': 'management_command',
                             'sample_user': True
                         }
                     )
-                    
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"❌ Failed to create user '{username}': {e}"))
+                    for user in created_users
+                ])
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"❌ Failed to create sample users: {e}"))
+            created_users = []
+        
+        for user in created_users:
+            self.stdout.write(f"✅ Created user: {user.username} ({user.get_role_display()})")
+        
+        created_count = len(created_users)
         
         if created_count > 0:
             self.stdout.write(self.style.SUCCESS(f'\n🎉 Successfully created {created_count} sample users'))
@@ -134,14 +167,11 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS('SAMPLE USER CREDENTIALS'))
             self.stdout.write('='*60)
             
-            for user_data in sample_users:
-                if not User.objects.filter(username=user_data['username']).exists():
-                    continue
-                    
-                self.stdout.write(f"\n{user_data['first_name']} {user_data['last_name']} ({user_data['role'].title()}):")
-                self.stdout.write(f"  Email: {user_data['email']}")
-                self.stdout.write(f"  Password: {user_data['password']}")
-                self.stdout.write(f"  Role: {user_data['role'].title()}")
+            for user in created_users:
+                self.stdout.write(f"\n{user.first_name} {user.last_name} ({user.role.title()}):")
+                self.stdout.write(f"  Email: {user.email}")
+                self.stdout.write(f"  Password: {_SAMPLE_PASSWORDS[user.username]}")
+                self.stdout.write(f"  Role: {user.role.title()}")
             
             self.stdout.write('\n' + '='*60)
             self.stdout.write(self.style.WARNING('⚠️  IMPORTANT SECURITY NOTES:'))
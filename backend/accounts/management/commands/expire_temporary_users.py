@@ -3,9 +3,13 @@ Management command to expire temporary users
 Run this as a cron job every hour: python manage.py expire_temporary_users
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
 from django.utils import timezone
 from accounts.models import User
-from accounts.utils import log_security_event
+from accounts.utils import build_security_event, bulk_log_security_events
+
+UPDATE_BATCH_SIZE = 10000
 
 
 class Command(BaseCommand):
@@ -23,14 +27,11 @@ class Command(BaseCommand):
         now = timezone.now()
 
         # Find temporary users that need to be expired
-        expired_users = User.objects.filter(
-            user_type='temporary',
-            is_expired=False,
-            expires_at__lte=now,
-            is_active=True
+        expired_users = list(
+            User.due_for_expiration(now).filter(is_active=True).only('id', 'username', 'expires_at')
         )
 
-        count = expired_users.count()
+        count = len(expired_users)
 
         if count == 0:
             self.stdout.write(self.style.SUCCESS('No temporary users to expire'))
@@ -46,33 +47,37 @@ class Command(BaseCommand):
                 self.stdout.write(f'  - {user.username} (expired at {user.expires_at})')
             return
 
-        # Expire users
-        expired_count = 0
-        for user in expired_users:
-            user.is_expired = True
-            user.is_active = False
-            user.save(update_fields=['is_expired', 'is_active'])
+        # Expire users in batches, each committed on its own, so row locks on a
+        # large pool are never held for longer than one batch
+        for start in range(0, len(expired_users), UPDATE_BATCH_SIZE):
+            batch = expired_users[start:start + UPDATE_BATCH_SIZE]
+            with transaction.atomic():
+                User.sweep_expired(now, pks=[user.pk for user in batch])
 
-            # Log expiration
-            log_security_event(
-                user=user,
-                action='user_expired',
-                description=f'Temporary user expired: {user.username}',
-                ip_address='127.0.0.1',  # System action
-                user_agent='System/Cron',
-                metadata={
-                    'user_id': user.id,
-                    'expires_at': user.expires_at.isoformat() if user.expires_at else None,
-                    'expired_at': now.isoformat()
-                }
-            )
+                # Log expirations
+                bulk_log_security_events([
+                    build_security_event(
+                        user=user,
+                        action='user_expired',
+                        description=f'Temporary user expired: {user.username}',
+                        ip_address='127.0.0.1',  # System action
+                        user_agent='System/Cron',
+                        metadata={
+                            'user_id': user.id,
+                            'expires_at': user.expires_at.isoformat() if user.expires_at else None,
+                            'expired_at': now.isoformat()
+                        }
+                    )
+                    for user in batch
+                ], batch_size=1000)
 
-            expired_count += 1
+        for user in expired_users:
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Expired user: {user.username} (ID: {user.id})'
                 )
             )
+        expired_count = len(expired_users)
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -81,22 +86,26 @@ class Command(BaseCommand):
         )
 
         # Show warning for users expiring soon (within 24 hours)
-        expiring_soon = User.objects.filter(
+        expiring_soon = list(User.objects.filter(
             user_type='temporary',
             is_expired=False,
             expires_at__gt=now,
             expires_at__lte=now + timezone.timedelta(hours=24),
             is_active=True
-        )
+        ).annotate(
+            time_remaining=ExpressionWrapper(
+                F('expires_at') - Value(now, output_field=DateTimeField()),
+                output_field=DurationField()
+            )
+        ).values_list('username', 'time_remaining'))
 
-        soon_count = expiring_soon.count()
+        soon_count = len(expiring_soon)
         if soon_count > 0:
             self.stdout.write(
                 self.style.WARNING(
                     f'\n⚠️  {soon_count} temporary users will expire within 24 hours:'
                 )
             )
-            for user in expiring_soon:
-                time_remaining = user.expires_at - now
+            for username, time_remaining in expiring_soon:
                 hours = int(time_remaining.total_seconds() / 3600)
-                self.stdout.write(f'  - {user.username} (expires in {hours} hours)')
+                self.stdout.write(f'  - {username} (expires in {hours} hours)')
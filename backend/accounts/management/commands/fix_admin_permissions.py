@@ -5,7 +5,7 @@ Ensures all admin role users have complete access to all permissions
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from accounts.models import User
-from permissions.models import Permission, RolePermission
+from permissions.models import Permission, RolePermission, invalidate_role_permission_codes
 
 
 class Command(BaseCommand):
@@ -37,23 +37,24 @@ class Command(BaseCommand):
 
             # Fix role permissions for admin role
             with transaction.atomic():
-                created_count = 0
-                updated_count = 0
-
-                for permission in all_permissions:
-                    role_perm, created = RolePermission.objects.update_or_create(
-                        role='admin',
-                        permission=permission,
-                        defaults={'is_granted': True}
-                    )
-
-                    if created:
-                        created_count += 1
-                    else:
-                        if not role_perm.is_granted:
-                            role_perm.is_granted = True
-                            role_perm.save()
-                            updated_count += 1
+                existing_ids = set(
+                    RolePermission.objects.filter(role='admin').values_list('permission_id', flat=True)
+                )
+                to_create = [
+                    RolePermission(role='admin', permission_id=permission_id, is_granted=True)
+                    for permission_id in all_permissions.values_list('id', flat=True)
+                    if permission_id not in existing_ids
+                ]
+                RolePermission.objects.bulk_create(to_create, batch_size=1000)
+                created_count = len(to_create)
+
+                updated_count = RolePermission.objects.filter(
+                    role='admin',
+                    is_granted=False
+                ).update(is_granted=True)
+
+                # bulk_create and update() skip the post_save invalidation
+                invalidate_role_permission_codes()
 
                 self.stdout.write(self.style.SUCCESS(
                     f'Admin role permissions: {created_count} created, {updated_count} updated'
@@ -62,13 +63,15 @@ class Command(BaseCommand):
             # List admin users
             if username:
                 admin_users = User.objects.filter(username=username, role='admin')
-                if not admin_users.exists():
-                    self.stdout.write(self.style.ERROR(f'No admin user found with username: {username}'))
-                    return
             else:
                 admin_users = User.objects.filter(role='admin')
 
-            admin_count = admin_users.count()
+            admin_user_list = list(admin_users)
+            admin_count = len(admin_user_list)
+
+            if username and admin_count == 0:
+                self.stdout.write(self.style.ERROR(f'No admin user found with username: {username}'))
+                return
 
             if admin_count == 0:
                 self.stdout.write(self.style.WARNING('No admin users found'))
@@ -76,23 +79,28 @@ class Command(BaseCommand):
 
             self.stdout.write(f'\nFound {admin_count} admin user(s):')
 
-            for user in admin_users:
-                # Ensure user is active and staff
-                updates = {}
+            # Ensure users are active and staff with one UPDATE per flag
+            admin_users.filter(is_active=False).update(is_active=True)
+            admin_users.filter(is_staff=False).update(is_staff=True)
+
+            # get_permissions() resolves every admin to the full permission set, so
+            # resolve it once instead of once per user
+            admin_permission_count = len(admin_user_list[0].get_permissions())
+
+            for user in admin_user_list:
+                updates = []
                 if not user.is_active:
-                    updates['is_active'] = True
+                    updates.append('is_active')
                 if not user.is_staff:
-                    updates['is_staff'] = True
+                    updates.append('is_staff')
 
                 if updates:
-                    User.objects.filter(pk=user.pk).update(**updates)
-                    self.stdout.write(f'  - {user.username}: Updated {", ".join(updates.keys())}')
+                    self.stdout.write(f'  - {user.username}: Updated {", ".join(updates)}')
                 else:
                     self.stdout.write(f'  - {user.username}: Already configured correctly')
 
                 # Show user permissions
-                user_permissions = user.get_permissions()
-                self.stdout.write(f'    Permissions: {len(user_permissions)}/{permission_count}')
+                self.stdout.write(f'    Permissions: {admin_permission_count}/{permission_count}')
 
             self.stdout.write(self.style.SUCCESS('\n✓ Admin permissions fixed successfully!'))
             self.stdout.write(self.style.SUCCESS('All admin users now have full access to:'))
@@ -3,9 +3,17 @@ Management command to list all users with their roles and status
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.utils import timezone
 
 User = get_user_model()
 
+_SUMMARY_FIELDS = ('username', 'email', 'role', 'is_active', 'two_factor_enabled')
+_DETAILED_FIELDS = _SUMMARY_FIELDS + (
+    'first_name', 'last_name', 'is_staff', 'is_superuser', 'failed_login_attempts',
+    'last_login', 'created_at'
+)
+
 
 class Command(BaseCommand):
     help = 'List all users with their roles and security status'
@@ -22,6 +30,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Show only active users',
         )
+        parser.add_argument(
+            '--locked-only',
+            action='store_true',
+            help='Show only currently locked accounts',
+        )
         parser.add_argument(
             '--detailed',
             action='store_true',
@@ -38,7 +51,15 @@ class Command(BaseCommand):
         if options.get('active_only'):
             queryset = queryset.filter(is_active=True)
         
-        users = list(queryset)
+        if options.get('locked_only'):
+            queryset = queryset.filter(account_locked_until__gt=timezone.now())
+        
+        # The summary table only needs a handful of columns
+        if options.get('detailed'):
+            fields = _DETAILED_FIELDS
+        else:
+            fields = _SUMMARY_FIELDS
+        users = list(queryset.values(*fields))
         
         if not users:
             self.stdout.write(self.style.WARNING('No users found matching the criteria.'))
@@ -55,59 +76,74 @@ class Command(BaseCommand):
             self.display_summary_users(users)
         
         # Display summary statistics
-        self.display_statistics(users)
+        self.display_statistics(queryset)
     
     def display_summary_users(self, users):
         """Display users in summary format"""
+        role_labels = dict(User.ROLE_CHOICES)
+        
         # Table header
         self.stdout.write(f'{"Username":<20} {"Email":<30} {"Role":<12} {"Status":<8} {"2FA":<5}')
         self.stdout.write('-' * 80)
         
         for user in users:
-            status = "Active" if user.is_active else "Inactive"
-            tfa_status = "Yes" if user.two_factor_enabled else "No"
+            status = "Active" if user['is_active'] else "Inactive"
+            tfa_status = "Yes" if user['two_factor_enabled'] else "No"
             
             self.stdout.write(
-                f'{user.username:<20} '
-                f'{user.email:<30} '
-                f'{user.get_role_display():<12} '
+                f'{user["username"]:<20} '
+                f'{user["email"]:<30} '
+                f'{role_labels.get(user["role"], user["role"]):<12} '
                 f'{status:<8} '
                 f'{tfa_status:<5}'
             )
     
     def display_detailed_users(self, users):
         """Display users in detailed format"""
+        role_labels = dict(User.ROLE_CHOICES)
+        
         for i, user in enumerate(users, 1):
-            self.stdout.write(f'\n{i}. {user.username} ({user.get_role_display()})')
+            self.stdout.write(f'\n{i}. {user["username"]} ({role_labels.get(user["role"], user["role"])})')
             self.stdout.write('-' * 40)
-            self.stdout.write(f'Email: {user.email}')
-            self.stdout.write(f'Full Name: {user.first_name} {user.last_name}')
-            self.stdout.write(f'Active: {"Yes" if user.is_active else "No"}')
-            self.stdout.write(f'Staff: {"Yes" if user.is_staff else "No"}')
-            self.stdout.write(f'Superuser: {"Yes" if user.is_superuser else "No"}')
-            self.stdout.write(f'2FA Enabled: {"Yes" if user.two_factor_enabled else "No"}')
-            self.stdout.write(f'Failed Login Attempts: {user.failed_login_attempts}')
-            self.stdout.write(f'Last Login: {user.last_login.strftime("%Y-%m-%d %H:%M:%S") if user.last_login else "Never"}')
-            self.stdout.write(f'Created: {user.created_at.strftime("%Y-%m-%d %H:%M:%S")}')
+            self.stdout.write(f'Email: {user["email"]}')
+            self.stdout.write(f'Full Name: {user["first_name"]} {user["last_name"]}')
+            self.stdout.write(f'Active: {"Yes" if user["is_active"] else "No"}')
+            self.stdout.write(f'Staff: {"Yes" if user["is_staff"] else "No"}')
+            self.stdout.write(f'Superuser: {"Yes" if user["is_superuser"] else "No"}')
+            self.stdout.write(f'2FA Enabled: {"Yes" if user["two_factor_enabled"] else "No"}')
+            self.stdout.write(f'Failed Login Attempts: {user["failed_login_attempts"]}')
+            self.stdout.write(f'Last Login: {user["last_login"].strftime("%Y-%m-%d %H:%M:%S") if user["last_login"] else "Never"}')
+            self.stdout.write(f'Created: {user["created_at"].strftime("%Y-%m-%d %H:%M:%S")}')
     
-    def display_statistics(self, users):
+    def display_statistics(self, queryset):
         """Display user statistics"""
-        total_users = len(users)
-        active_users = len([u for u in users if u.is_active])
-        tfa_users = len([u for u in users if u.two_factor_enabled])
+        stats = queryset.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            locked=Count('id', filter=Q(account_locked_until__gt=timezone.now())),
+            tfa=Count('id', filter=Q(two_factor_enabled=True)),
+        )
+        total_users = stats['total']
+        active_users = stats['active']
+        locked_users = stats['locked']
+        tfa_users = stats['tfa']
         
-        role_counts = {}
-        for user in users:
-            role_counts[user.role] = role_counts.get(user.role, 0) + 1
+        # Group in SQL; order_by('role') drops the username ordering, which
+        # would otherwise be added to the GROUP BY
+        role_counts = {
+            row['role']: row['count']
+            for row in queryset.order_by('role').values('role').annotate(count=Count('id'))
+        }
         
         self.stdout.write('\n' + '='*40)
         self.stdout.write(self.style.SUCCESS('STATISTICS'))
         self.stdout.write('='*40)
         self.stdout.write(f'Total Users: {total_users}')
         self.stdout.write(f'Active Users: {active_users}')
+        self.stdout.write(f'Locked Accounts: {locked_users}')
         self.stdout.write(f'2FA Enabled: {tfa_users}')
         self.stdout.write('')
         self.stdout.write('Users by Role:')
         for role, count in role_counts.items():
             role_display = dict(User.ROLE_CHOICES).get(role, role)
-            self.stdout.write(f'  {role_display}: {count}')
\ No newline at end of file
+            self.stdout.write(f'  {role_display}: {count}')
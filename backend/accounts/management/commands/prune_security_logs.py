@@ -0,0 +1,72 @@
+"""
+Management command to prune old audit log and login attempt rows
+Run this as a cron job every night: python manage.py prune_security_logs
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import AuditLog, LoginAttempt
+
+DELETE_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Delete audit log and login attempt rows older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--audit-days',
+            type=int,
+            default=365,
+            help='Keep audit log entries for this many days (default: 365)',
+        )
+        parser.add_argument(
+            '--login-days',
+            type=int,
+            default=90,
+            help='Keep login attempts for this many days (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DELETE_BATCH_SIZE,
+            help=f'Rows deleted per statement (default: {DELETE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many rows would be deleted without deleting them',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        targets = [
+            ('audit log entries', AuditLog, now - timezone.timedelta(days=options['audit_days'])),
+            ('login attempts', LoginAttempt, now - timezone.timedelta(days=options['login_days'])),
+        ]
+
+        for label, model, cutoff in targets:
+            queryset = model.objects.filter(timestamp__lt=cutoff)
+
+            if options['dry_run']:
+                self.stdout.write(
+                    self.style.WARNING(f'DRY RUN: Would delete {queryset.count()} {label} older than {cutoff:%Y-%m-%d}')
+                )
+                continue
+
+            deleted = self._delete_in_batches(queryset, options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ Deleted {deleted} {label} older than {cutoff:%Y-%m-%d}')
+            )
+
+    def _delete_in_batches(self, queryset, batch_size):
+        """
+        Delete matching rows oldest-first in bounded statements, so a large
+        backlog never turns into one long-running DELETE holding its locks
+        """
+        deleted = 0
+        while True:
+            pks = list(queryset.order_by('timestamp').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            count, _ = queryset.model.objects.filter(pk__in=pks).delete()
+            deleted += count
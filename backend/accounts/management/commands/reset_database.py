@@ -4,6 +4,7 @@ Management command to reset database (development only)
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from django.conf import settings
+from django.db import transaction
 import os
 
 
@@ -39,12 +40,14 @@ class Command(BaseCommand):
         self.stdout.write('Running migrations...')
         call_command('migrate')
         
-        # Create default data
+        # Create default data, committing each seed once instead of per row
         self.stdout.write('Creating default permissions...')
-        call_command('create_default_permissions')
+        with transaction.atomic():
+            call_command('create_default_permissions')
         
         self.stdout.write('Creating dashboard sections...')
-        call_command('create_dashboard_sections')
+        with transaction.atomic():
+            call_command('create_dashboard_sections')
         
         self.stdout.write(self.style.SUCCESS('\n✅ Database reset complete!'))
         self.stdout.write('\n📝 Next steps:')
@@ -3,43 +3,62 @@ Management command to unlock user accounts
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from accounts.utils import log_security_event
-
-User = get_user_model()
+from django.db import transaction
+from django.utils import timezone
+from accounts.utils import build_security_event, bulk_log_security_events
 
 
 class Command(BaseCommand):
-    help = 'Unlock a locked user account'
+    help = 'Unlock one or more locked user accounts'
     
     def add_arguments(self, parser):
         parser.add_argument(
-            'username',
+            'usernames',
+            nargs='+',
             type=str,
-            help='Username of the account to unlock',
+            help='Username(s) of the account(s) to unlock',
         )
     
     def handle(self, *args, **options):
-        username = options['username']
+        User = get_user_model()
+        usernames = options['usernames']
         
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'❌ User "{username}" not found.'))
-            return
+        users = {
+            user.username: user
+            for user in User.objects.filter(username__in=usernames).only(
+                'id', 'username', 'account_locked_until'
+            )
+        }
+        now = timezone.now()
         
-        if not user.is_account_locked():
-            self.stdout.write(self.style.WARNING(f'⚠️  Account "{username}" is not locked.'))
-            return
+        to_unlock = []
+        for username in usernames:
+            user = users.get(username)
+            if user is None:
+                self.stdout.write(self.style.ERROR(f'❌ User "{username}" not found.'))
+            elif not (user.account_locked_until and user.account_locked_until > now):
+                self.stdout.write(self.style.WARNING(f'⚠️  Account "{username}" is not locked.'))
+            elif user not in to_unlock:
+                to_unlock.append(user)
         
-        # Unlock the account
-        user.unlock_account()
+        if not to_unlock:
+            return
         
-        # Log the unlock action
-        log_security_event(
-            user=user,
-            action='account_unlocked',
-            description=f'Account unlocked via management command',
-            metadata={'unlocked_by': 'management_command'}
-        )
+        # Unlock the accounts and log the unlock actions in one UPDATE and one INSERT
+        with transaction.atomic():
+            User.objects.filter(pk__in=[user.pk for user in to_unlock]).update(
+                account_locked_until=None,
+                failed_login_attempts=0
+            )
+            bulk_log_security_events([
+                build_security_event(
+                    user=user,
+                    action='account_unlocked',
+                    description='Account unlocked via management command',
+                    metadata={'unlocked_by': 'management_command'}
+                )
+                for user in to_unlock
+            ])
         
-        self.stdout.write(self.style.SUCCESS(f'✅ Account "{username}" has been unlocked.'))
\ No newline at end of file
+        for user in to_unlock:
+            self.stdout.write(self.style.SUCCESS(f'✅ Account "{user.username}" has been unlocked.'))
@@ -1,10 +1,42 @@
 """
 Middleware for authentication and authorization checks
 """
+import re
+
+from django.conf import settings
 from django.utils import timezone
 from django.http import JsonResponse
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import AuthenticationFailed
+from .authentication import authenticate_request_jwt
+
+# Matches patterns like /api/facilities/locations/1 or /api/facilities/locations/1/
+_LOCATION_RE = re.compile(r'/api/facilities/locations/(?P<id>\d+)')
+
+# Paths that never need the authenticated user; an unset (empty) STATIC_URL or
+# MEDIA_URL is dropped, since it would match every path
+_SKIP_PREFIXES = tuple(
+    prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL, '/api/health/', '/favicon')
+    if prefix
+)
+
+
+_MISSING = object()
+
+
+def _get_request_user(request):
+    """
+    Resolve the authenticated user for a request, falling back to the JWT in
+    the Authorization header when there is no session user. The result is
+    memoized on the request, so both middlewares share one lookup and DRF's
+    RequestCachedJWTAuthentication reuses it instead of authenticating again.
+    """
+    user = getattr(request, '_cached_jwt_user', _MISSING)
+    if user is _MISSING:
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            result = authenticate_request_jwt(request)
+            user = result[0] if result else None
+        request._cached_jwt_user = user
+    return user
 
 
 class UserExpirationMiddleware:
@@ -15,22 +47,32 @@ class UserExpirationMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # Check if user is authenticated
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            user = request.user
+        # Skip preflights and static/health requests without touching request.user
+        if request.method == 'OPTIONS' or request.path.startswith(_SKIP_PREFIXES):
+            return self.get_response(request)
 
+        # Check if user is authenticated
+        user = _get_request_user(request)
+        if user is not None and user.is_authenticated:
             # Check if temporary user has expired
             if user.user_type == 'temporary':
-                if user.check_expiration():
+                now = timezone.now()
+                expires_at = user.expires_at
+
+                # Compare in Python and only persist the expiry (one UPDATE) the
+                # first time it is seen; expire_temporary_users catches the rest
+                if user.is_expired or (expires_at and expires_at <= now):
+                    if not user.is_expired:
+                        user.check_expiration()
                     return JsonResponse({
                         'error': 'User account has expired',
                         'code': 'ACCOUNT_EXPIRED',
-                        'expired_at': user.expires_at.isoformat() if user.expires_at else None
+                        'expired_at': expires_at.isoformat() if expires_at else None
                     }, status=401)
 
                 # Check if user is about to expire (within 1 hour)
-                if user.expires_at:
-                    time_remaining = user.expires_at - timezone.now()
+                if expires_at:
+                    time_remaining = expires_at - now
                     if time_remaining.total_seconds() < 3600:  # Less than 1 hour
                         request.user_expiring_soon = True
                         request.time_until_expiration = int(time_remaining.total_seconds())
@@ -52,34 +94,34 @@ class LocationAccessMiddleware:
             return self.get_response(request)
 
         # Skip for unauthenticated requests (will be handled by authentication)
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        user = _get_request_user(request)
+        if user is None or not user.is_authenticated:
+            return self.get_response(request)
+
+        # Admins and superusers have access to all locations
+        if user.is_superuser or getattr(user, 'role', None) == 'admin':
             return self.get_response(request)
 
         # Extract location_id from URL if present
         location_id = self._extract_location_id(request)
 
         if location_id:
-            user = request.user
-            # Admins and superusers have access to all locations
-            if not (user.is_superuser or user.role == 'admin'):
-                if not user.has_location_access(location_id):
-                    return JsonResponse({
-                        'error': 'You do not have access to this location',
-                        'code': 'LOCATION_ACCESS_DENIED',
-                        'location_id': location_id
-                    }, status=403)
+            if not user.has_location_access(location_id):
+                return JsonResponse({
+                    'error': 'You do not have access to this location',
+                    'code': 'LOCATION_ACCESS_DENIED',
+                    'location_id': location_id
+                }, status=403)
 
         response = self.get_response(request)
         return response
 
     def _extract_location_id(self, request):
-        """Extract location ID from URL path"""
-        import re
-
-        # Match patterns like /api/facilities/locations/1 or /api/facilities/locations/1/
-        location_match = re.search(r'/api/facilities/locations/(\d+)', request.path)
-        if location_match:
-            return int(location_match.group(1))
+        """Extract location ID from the URL path or query string"""
+        if request.path.startswith('/api/facilities/locations/'):
+            location_match = _LOCATION_RE.match(request.path)
+            if location_match:
+                return int(location_match.group('id'))
 
         # Check query parameters
         if 'location_id' in request.GET:
@@ -88,12 +130,6 @@ class LocationAccessMiddleware:
             except (ValueError, TypeError):
                 pass
 
-        # Check POST data
-        if request.method == 'POST' and hasattr(request, 'data'):
-            if isinstance(request.data, dict) and 'location_id' in request.data:
-                try:
-                    return int(request.data['location_id'])
-                except (ValueError, TypeError):
-                    pass
-
+        # Request bodies are left to the views: parsing them here would cost a
+        # parse per request, and DRF's request.data is not available yet anyway
         return None
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='account_locked_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
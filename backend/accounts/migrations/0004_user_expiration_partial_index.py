@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_account_locked_until_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Expiration datetime for temporary users', null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='is_expired',
+            field=models.BooleanField(default=False, help_text='Whether the temporary user has expired'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_expired', False), ('user_type', 'temporary')), fields=['expires_at'], name='user_exp_due_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:36
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def hash_existing_backup_codes(apps, schema_editor):
+    """Move plaintext backup codes from the user row into hashed rows"""
+    User = apps.get_model('accounts', 'User')
+    UserBackupCode = apps.get_model('accounts', 'UserBackupCode')
+
+    rows = []
+    for user_id, codes in User.objects.exclude(backup_codes=[]).values_list('id', 'backup_codes'):
+        hashes = {hashlib.sha256(code.strip().upper().encode()).hexdigest() for code in codes or []}
+        rows.extend(UserBackupCode(user_id=user_id, code_hash=code_hash) for code_hash in hashes)
+    UserBackupCode.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_expiration_partial_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBackupCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_hash', models.CharField(max_length=64)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backup_codes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_backup_codes',
+                'unique_together': {('user', 'code_hash')},
+            },
+        ),
+        # Hashes cannot be turned back into codes, so reversing just drops them
+        migrations.RunPython(hash_existing_backup_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='backup_codes',
+        ),
+    ]
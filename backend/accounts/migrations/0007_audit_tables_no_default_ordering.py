@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_manager'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='auditlog',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='loginattempt',
+            options={},
+        ),
+    ]
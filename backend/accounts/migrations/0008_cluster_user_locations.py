@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def cluster_user_locations(apps, schema_editor):
+    """
+    Physically order user_locations by user so one user's assignments share pages.
+    PostgreSQL only; CLUSTER does not persist for new rows, so re-run it (or
+    pg_repack, which does not hold an exclusive lock) during maintenance.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CLUSTER user_locations USING ul_user_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_audit_tables_no_default_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(cluster_user_locations, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,11 @@
 """
 User models with role-based access control
 """
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.text import slugify
+import hashlib
 import pyotp
 
 
@@ -31,6 +32,37 @@ class Organization(models.Model):
         super().save(*args, **kwargs)
 
 
+class UserManager(BaseUserManager):
+    """
+    User manager with helpers for loading access-related relations
+    """
+    def with_access_context(self):
+        """
+        Users with their organization joined and their active location
+        assignments prefetched, for listing many users at once
+        """
+        return self.get_queryset().select_related('organization').prefetch_related(
+            models.Prefetch(
+                'user_locations',
+                queryset=UserLocation.objects.filter(location__is_active=True).select_related('location'),
+                to_attr='active_user_locations'
+            )
+        )
+
+    def valid(self, now=None):
+        """
+        Users that can currently sign in: active, not locked and, for temporary
+        users, not past their expiry. Mirrors is_valid_user() and
+        is_account_locked() in SQL so invalid users are never loaded
+        """
+        now = now or timezone.now()
+        return self.get_queryset().filter(is_active=True).exclude(
+            account_locked_until__gt=now
+        ).exclude(
+            user_type='temporary', expires_at__lte=now
+        )
+
+
 class User(AbstractUser):
     """
     Custom User model with role-based access control and location-based access
@@ -40,11 +72,13 @@ class User(AbstractUser):
         ('contributor', 'Contributor'),
         ('viewer', 'Viewer'),
     ]
+    ROLE_VALUES = frozenset(value for value, _ in ROLE_CHOICES)
 
     USER_TYPE_CHOICES = [
         ('permanent', 'Permanent'),
         ('temporary', 'Temporary'),
     ]
+    USER_TYPE_VALUES = frozenset(value for value, _ in USER_TYPE_CHOICES)
 
     role = models.CharField(
         max_length=20,
@@ -63,14 +97,12 @@ class User(AbstractUser):
     expires_at = models.DateTimeField(
         null=True,
         blank=True,
-        help_text='Expiration datetime for temporary users',
-        db_index=True
+        help_text='Expiration datetime for temporary users'
     )
 
     is_expired = models.BooleanField(
         default=False,
-        help_text='Whether the temporary user has expired',
-        db_index=True
+        help_text='Whether the temporary user has expired'
     )
 
     # Organization
@@ -86,11 +118,10 @@ class User(AbstractUser):
     # Two-Factor Authentication
     two_factor_enabled = models.BooleanField(default=False)
     totp_secret = models.CharField(max_length=32, blank=True)
-    backup_codes = models.JSONField(default=list, blank=True)
     
     # Account Security
     failed_login_attempts = models.PositiveIntegerField(default=0)
-    account_locked_until = models.DateTimeField(null=True, blank=True)
+    account_locked_until = models.DateTimeField(null=True, blank=True, db_index=True)
     last_password_change = models.DateTimeField(auto_now_add=True)
     force_password_change = models.BooleanField(default=False)
     
@@ -102,12 +133,33 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserManager()
+    
     class Meta:
         db_table = 'auth_user'
+        indexes = [
+            # Serves the expire_temporary_users sweep; only pending temporary users are indexed
+            models.Index(
+                fields=['expires_at'],
+                name='user_exp_due_idx',
+                condition=models.Q(user_type='temporary', is_expired=False)
+            ),
+        ]
         
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
     
+    def save(self, *args, **kwargs):
+        # A role or flag change makes the memoized access lookups stale
+        self.clear_access_cache()
+        super().save(*args, **kwargs)
+    
+    def clear_access_cache(self):
+        """Drop the permission and location lookups memoized on this instance"""
+        self.__dict__.pop('_permissions_cache', None)
+        self.__dict__.pop('_location_ids_cache', None)
+        self.__dict__.pop('_location_id_set', None)
+    
     def is_account_locked(self):
         """Check if account is currently locked"""
         if self.account_locked_until:
@@ -127,10 +179,22 @@ class User(AbstractUser):
     
     def increment_failed_login(self):
         """Increment failed login attempts and lock if threshold reached"""
-        self.failed_login_attempts += 1
-        if self.failed_login_attempts >= 5:
-            self.lock_account()
-        self.save(update_fields=['failed_login_attempts'])
+        locked_until = timezone.now() + timezone.timedelta(minutes=30)
+
+        # One atomic UPDATE, so concurrent failures cannot lose an increment;
+        # the CASE sees the pre-increment value, hence >= 4 for the fifth failure
+        User.objects.filter(pk=self.pk).update(
+            failed_login_attempts=models.F('failed_login_attempts') + 1,
+            account_locked_until=models.Case(
+                models.When(failed_login_attempts__gte=4, then=models.Value(locked_until)),
+                default=models.F('account_locked_until')
+            )
+        )
+
+        # Read back the values the UPDATE produced; mirroring them from this
+        # instance could be stale under concurrent failures, and a later save()
+        # would then write the stale count back
+        self.refresh_from_db(fields=['failed_login_attempts', 'account_locked_until'])
     
     def reset_failed_login(self):
         """Reset failed login attempts on successful login"""
@@ -159,24 +223,38 @@ class User(AbstractUser):
         if not self.totp_secret:
             return False
         
-        totp = pyotp.TOTP(self.totp_secret)
-        return totp.verify(token, valid_window=1)
+        # Reject anything that is not a 6-digit code (e.g. backup codes) before
+        # computing the HMACs for the verification window
+        token = str(token)
+        if len(token) != 6 or not token.isdigit():
+            return False
+        
+        # Reuse the TOTP object while the secret is unchanged
+        cached = self.__dict__.get('_totp')
+        if cached is None or cached.secret != self.totp_secret:
+            cached = pyotp.TOTP(self.totp_secret)
+            self._totp = cached
+        return cached.verify(token, valid_window=1)
     
     def generate_backup_codes(self):
-        """Generate backup codes for 2FA"""
+        """Generate backup codes for 2FA, replacing any existing ones"""
         import secrets
         codes = [secrets.token_hex(4).upper() for _ in range(10)]
-        self.backup_codes = codes
-        self.save(update_fields=['backup_codes'])
+        with transaction.atomic():
+            self.backup_codes.all().delete()
+            UserBackupCode.objects.bulk_create([
+                UserBackupCode(user=self, code_hash=UserBackupCode.hash_code(code))
+                for code in codes
+            ])
         return codes
     
     def use_backup_code(self, code):
-        """Use a backup code and remove it from available codes"""
-        if code.upper() in self.backup_codes:
-            self.backup_codes.remove(code.upper())
-            self.save(update_fields=['backup_codes'])
-            return True
-        return False
+        """Use a backup code, marking it used so it cannot be replayed"""
+        return UserBackupCode.objects.filter(
+            user=self,
+            code_hash=UserBackupCode.hash_code(code),
+            used_at__isnull=True
+        ).update(used_at=timezone.now()) == 1
     
     @property
     def is_admin(self):
@@ -217,6 +295,23 @@ class User(AbstractUser):
                 return True
         return self.is_expired
 
+    @classmethod
+    def due_for_expiration(cls, now=None):
+        """Get temporary users that are past their expiry but not yet expired"""
+        return cls.objects.filter(
+            user_type='temporary',
+            is_expired=False,
+            expires_at__lte=now or timezone.now()
+        )
+
+    @classmethod
+    def sweep_expired(cls, now=None, pks=None):
+        """Expire overdue temporary users with a single UPDATE and return the count"""
+        queryset = cls.due_for_expiration(now)
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        return queryset.update(is_expired=True, is_active=False)
+
     def is_valid_user(self):
         """Check if user is valid (active and not expired)"""
         if not self.is_active:
@@ -226,40 +321,85 @@ class User(AbstractUser):
         return True
 
     def get_assigned_locations(self):
-        """Get all locations assigned to this user"""
-        return self.user_locations.filter(location__is_active=True).select_related('location')
+        """Get a list of this user's active location assignments"""
+        # Loaded by User.objects.with_access_context()
+        prefetched = getattr(self, 'active_user_locations', None)
+        if prefetched is not None:
+            return prefetched
+        return list(self.user_locations.filter(location__is_active=True).select_related('location'))
 
     def has_location_access(self, location_id):
         """Check if user has access to a specific location"""
         if self.is_superuser or self.role == 'admin':
             return True
-        return self.user_locations.filter(location_id=location_id, location__is_active=True).exists()
+        location_id_set = self.__dict__.get('_location_id_set')
+        if location_id_set is None:
+            location_id_set = frozenset(self.get_accessible_location_ids())
+            self._location_id_set = location_id_set
+        return int(location_id) in location_id_set
 
     def get_accessible_location_ids(self):
         """Get list of location IDs user can access"""
+        # Memoized for the lifetime of the instance (in practice one request)
+        location_ids = self.__dict__.get('_location_ids_cache')
+        if location_ids is None:
+            location_ids = tuple(self._query_accessible_location_ids())
+            self._location_ids_cache = location_ids
+        return list(location_ids)
+
+    def _query_accessible_location_ids(self):
         if self.is_superuser or self.role == 'admin':
+            # Locations are not organization-scoped, so admins see every active one;
+            # callers use the ids as a set, so skip the default ordering by name
             from facilities.models import Location
-            queryset = Location.objects.filter(is_active=True)
-            if self.organization:
-                queryset = queryset.filter(organization=self.organization)
-            return list(queryset.values_list('id', flat=True))
-        return list(self.user_locations.filter(location__is_active=True).values_list('location_id', flat=True))
+            return Location.objects.filter(is_active=True).order_by().values_list('id', flat=True)
+        return self.user_locations.filter(location__is_active=True).values_list('location_id', flat=True)
 
     def get_permissions(self):
         """Get list of permission codes for this user"""
-        from permissions.models import Permission, RolePermission
+        # Memoized for the lifetime of the instance (in practice one request)
+        permissions = self.__dict__.get('_permissions_cache')
+        if permissions is None:
+            permissions = tuple(self._query_permissions())
+            self._permissions_cache = permissions
+        return list(permissions)
+
+    def _query_permissions(self):
+        from permissions.models import get_role_permission_codes
 
         # Superusers and admins get all permissions
         if self.is_superuser or self.role == 'admin':
-            return list(Permission.objects.values_list('code', flat=True))
+            return get_role_permission_codes('admin')
 
         # Get permissions for user's role
-        role_permissions = RolePermission.objects.filter(
-            role=self.role,
-            is_granted=True
-        ).select_related('permission')
+        return get_role_permission_codes(self.role)
 
-        return [rp.permission.code for rp in role_permissions]
+
+class UserBackupCode(models.Model):
+    """
+    Two-factor backup code, stored as a SHA-256 hash and usable once
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='backup_codes'
+    )
+    code_hash = models.CharField(max_length=64)
+    used_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'user_backup_codes'
+        unique_together = [('user', 'code_hash')]
+
+    def __str__(self):
+        status = "used" if self.used_at else "unused"
+        return f"{self.user.username} backup code ({status})"
+
+    @staticmethod
+    def hash_code(code):
+        """Hash a backup code; codes are case-insensitive"""
+        return hashlib.sha256(code.strip().upper().encode()).hexdigest()
 
 
 class AuditLog(models.Model):
@@ -298,7 +438,6 @@ class AuditLog(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     
     class Meta:
-        ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['user', 'action']),
             models.Index(fields=['timestamp']),
@@ -321,7 +460,6 @@ class LoginAttempt(models.Model):
     user_agent = models.TextField(blank=True)
     
     class Meta:
-        ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['username', 'ip_address']),
             models.Index(fields=['timestamp']),
@@ -364,4 +502,19 @@ class UserLocation(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.user.username} -> {self.location.name}"
\ No newline at end of file
+        return f"{self.user.username} -> {self.location.name}"
+
+    @classmethod
+    def assign_many(cls, user, location_ids, created_by=None, batch_size=500):
+        """
+        Assign several locations to a user in multi-row INSERTs
+        Existing assignments are skipped by the unique constraint
+        """
+        cls.objects.bulk_create(
+            [cls(user=user, location_id=location_id, created_by=created_by) for location_id in location_ids],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+
+        # bulk_create skips the post_save signal that resets the user's memo
+        user.clear_access_cache()
\ No newline at end of file
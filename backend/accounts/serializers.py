@@ -204,7 +204,7 @@ class CreateUserSerializer(serializers.ModelSerializer):
     """
     password = serializers.CharField(write_only=True, min_length=9)
     user_type = serializers.ChoiceField(
-        choices=['permanent', 'temporary'],
+        choices=User.USER_TYPE_CHOICES,
         default='permanent'
     )
     expires_at = serializers.DateTimeField(required=False, allow_null=True)
@@ -299,6 +299,9 @@ class UserListSerializer(serializers.ModelSerializer):
     def get_location_count(self, obj):
         """Get total count of assigned locations"""
         if obj.is_superuser or obj.role == 'admin':
-            from facilities.models import Location
-            return Location.objects.filter(is_active=True).count()
-        return obj.user_locations.filter(location__is_active=True).count()
\ No newline at end of file
+            # Same for every admin, so count once per response
+            if not hasattr(self, '_active_location_count'):
+                from facilities.models import Location
+                self._active_location_count = Location.objects.filter(is_active=True).count()
+            return self._active_location_count
+        return len(obj.get_assigned_locations())
\ No newline at end of file
@@ -4,7 +4,7 @@ Signal handlers for accounts app
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from .models import User
+from .models import User, UserLocation
 from .utils import get_client_ip, log_security_event
 
 
@@ -106,6 +106,17 @@ def user_post_delete(sender, instance, **kwargs):
     )
 
 
+@receiver(post_save, sender=UserLocation)
+@receiver(post_delete, sender=UserLocation)
+def user_location_changed(sender, instance, **kwargs):
+    """
+    Reset the memoized access lookups on the related user, if it is loaded
+    """
+    user = sender.user.field.get_cached_value(instance, None)
+    if user is not None:
+        user.clear_access_cache()
+
+
 @receiver(user_logged_in)
 def user_logged_in_handler(sender, request, user, **kwargs):
     """
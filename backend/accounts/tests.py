@@ -1,12 +1,16 @@
 """
 Tests for accounts app
 """
+from io import StringIO
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from .models import AuditLog, LoginAttempt
 
 User = get_user_model()
 
@@ -56,12 +60,123 @@ class UserModelTest(TestCase):
             self.user.increment_failed_login()
         
         self.assertTrue(self.user.is_account_locked())
+        stored = User.objects.get(pk=self.user.pk)
+        self.assertEqual(stored.failed_login_attempts, 5)
+        self.assertTrue(stored.is_account_locked())
         
         # Unlock account
         self.user.unlock_account()
         self.assertFalse(self.user.is_account_locked())
         self.assertEqual(self.user.failed_login_attempts, 0)
 
+    def test_failed_login_from_stale_instance(self):
+        """Test a stale instance picks up failures counted elsewhere"""
+        stale = User.objects.get(pk=self.user.pk)
+        for _ in range(4):
+            self.user.increment_failed_login()
+
+        stale.increment_failed_login()
+
+        self.assertEqual(stale.failed_login_attempts, 5)
+        self.assertTrue(stale.is_account_locked())
+
+    def test_valid_users_queryset(self):
+        """Test valid() excludes locked, inactive and expired users in SQL"""
+        now = timezone.now()
+        User.objects.create_user(username='inactive', password='TestPassword123!', is_active=False)
+        User.objects.create_user(
+            username='locked', password='TestPassword123!',
+            account_locked_until=now + timezone.timedelta(minutes=30)
+        )
+        User.objects.create_user(
+            username='overdue', password='TestPassword123!',
+            user_type='temporary', expires_at=now - timezone.timedelta(minutes=1)
+        )
+        User.objects.create_user(
+            username='temp', password='TestPassword123!',
+            user_type='temporary', expires_at=now + timezone.timedelta(days=1)
+        )
+
+        usernames = set(User.objects.valid(now).values_list('username', flat=True))
+        self.assertEqual(usernames, {'testuser', 'temp'})
+
+    def test_verify_totp(self):
+        """Test TOTP verification accepts current codes and rejects malformed ones"""
+        import pyotp
+        secret = self.user.generate_totp_secret()
+        
+        self.assertTrue(self.user.verify_totp(pyotp.TOTP(secret).now()))
+        self.assertFalse(self.user.verify_totp('12345'))
+        self.assertFalse(self.user.verify_totp('ABCDEF12'))
+    
+    def test_backup_codes(self):
+        """Test backup codes are stored hashed and usable once"""
+        codes = self.user.generate_backup_codes()
+        self.assertEqual(self.user.backup_codes.count(), 10)
+        self.assertFalse(self.user.backup_codes.filter(code_hash=codes[0]).exists())
+        
+        self.assertTrue(self.user.use_backup_code(codes[0].lower()))
+        self.assertFalse(self.user.use_backup_code(codes[0]))
+        self.assertFalse(self.user.use_backup_code('NOTACODE'))
+    
+    def test_access_lookups_memoized(self):
+        """Test permission and location lookups are cached until save"""
+        permissions = self.user.get_permissions()
+        location_ids = self.user.get_accessible_location_ids()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(self.user.get_permissions(), permissions)
+            self.assertEqual(self.user.get_accessible_location_ids(), location_ids)
+        
+        self.user.save(update_fields=['role'])
+        self.assertNotIn('_permissions_cache', self.user.__dict__)
+        self.assertNotIn('_location_ids_cache', self.user.__dict__)
+    
+    def test_admin_accessible_locations(self):
+        """Test admins with an organization can list every active location"""
+        from facilities.models import Location
+        from .models import Organization
+        
+        admin_user = User.objects.create_user(
+            username='orgadmin',
+            email='orgadmin@example.com',
+            password='AdminPassword123!',
+            role='admin',
+            organization=Organization.objects.create(name='Org')
+        )
+        location = Location.objects.create(name='Site', created_by=admin_user)
+        
+        self.assertEqual(admin_user.get_accessible_location_ids(), [location.id])
+    
+    def test_has_location_access(self):
+        """Test location access is checked against one cached lookup"""
+        from facilities.models import Location
+        from .models import UserLocation
+        
+        assigned = Location.objects.create(name='Assigned', created_by=self.user)
+        other = Location.objects.create(name='Other', created_by=self.user)
+        UserLocation.objects.create(user=self.user, location=assigned)
+        
+        with self.assertNumQueries(1):
+            self.assertTrue(self.user.has_location_access(assigned.id))
+            self.assertFalse(self.user.has_location_access(other.id))
+    
+    def test_assign_many_locations(self):
+        """Test bulk location assignment skips existing rows"""
+        from facilities.models import Location
+        from .models import UserLocation
+        
+        locations = [
+            Location.objects.create(name=f'Site {i}', created_by=self.user) for i in range(3)
+        ]
+        UserLocation.objects.create(user=self.user, location=locations[0])
+        self.assertEqual(len(self.user.get_accessible_location_ids()), 1)
+        
+        UserLocation.assign_many(self.user, [location.id for location in locations])
+        
+        self.assertEqual(UserLocation.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(len(self.user.get_accessible_location_ids()), 3)
+
 
 class AuthenticationAPITest(APITestCase):
     """Test authentication API endpoints"""
@@ -106,6 +221,16 @@ class AuthenticationAPITest(APITestCase):
         response = self.client.post(self.logout_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_password_reset_for_locked_user(self):
+        """Test a locked-out user still receives a password reset email"""
+        from django.core import mail
+
+        self.user.lock_account()
+        response = self.client.post(reverse('password_reset'), {'email': 'test@example.com'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 1)
+
 
 class UserManagementAPITest(APITestCase):
     """Test user management API endpoints"""
@@ -136,9 +261,310 @@ class UserManagementAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(User.objects.filter(username='newuser').exists())
     
+    def test_list_users_prefetches_locations(self):
+        """Test the user list does not query locations per user"""
+        from facilities.models import Location
+        from .models import UserLocation
+        
+        location = Location.objects.create(name='Site A', created_by=self.admin_user)
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'viewer{i}',
+                email=f'viewer{i}@example.com',
+                password='TestPassword123!',
+                role='viewer'
+            )
+            UserLocation.objects.create(user=user, location=location)
+        
+        users = list(User.objects.with_access_context())
+        with self.assertNumQueries(0):
+            counts = {user.username: len(user.get_assigned_locations()) for user in users}
+        self.assertEqual(counts['viewer0'], 1)
+        self.assertEqual(counts['admin'], 0)
+    
     def test_list_users(self):
         """Test listing users"""
         url = reverse('user_list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
\ No newline at end of file
+        self.assertIsInstance(response.data, list)
+
+
+class ExpireTemporaryUsersCommandTest(TestCase):
+    """Test the expire_temporary_users management command"""
+    
+    def setUp(self):
+        now = timezone.now()
+        self.expired = User.objects.create_user(
+            username='expired',
+            email='expired@example.com',
+            password='TestPassword123!',
+            user_type='temporary',
+            expires_at=now - timezone.timedelta(hours=1)
+        )
+        self.pending = User.objects.create_user(
+            username='pending',
+            email='pending@example.com',
+            password='TestPassword123!',
+            user_type='temporary',
+            expires_at=now + timezone.timedelta(hours=2)
+        )
+    
+    def test_expires_overdue_users(self):
+        """Test overdue temporary users are expired and logged"""
+        out = StringIO()
+        call_command('expire_temporary_users', stdout=out)
+        
+        self.expired.refresh_from_db()
+        self.pending.refresh_from_db()
+        self.assertTrue(self.expired.is_expired)
+        self.assertFalse(self.expired.is_active)
+        self.assertFalse(self.pending.is_expired)
+        self.assertTrue(self.pending.is_active)
+        self.assertTrue(AuditLog.objects.filter(user=self.expired, action='user_expired').exists())
+        self.assertIn('pending (expires in 1 hours)', out.getvalue())
+    
+    def test_sweep_expired(self):
+        """Test the bulk sweep only expires overdue users"""
+        self.assertEqual(User.sweep_expired(), 1)
+        self.assertEqual(User.sweep_expired(), 0)
+        self.assertTrue(User.objects.get(pk=self.expired.pk).is_expired)
+        self.assertFalse(User.objects.get(pk=self.pending.pk).is_expired)
+    
+    def test_dry_run(self):
+        """Test dry run leaves users untouched"""
+        call_command('expire_temporary_users', '--dry-run', stdout=StringIO())
+        
+        self.expired.refresh_from_db()
+        self.assertFalse(self.expired.is_expired)
+        self.assertTrue(self.expired.is_active)
+
+
+class LocationAccessMiddlewareTest(TestCase):
+    """Test location access enforcement"""
+    
+    def setUp(self):
+        from facilities.models import Location
+        from .middleware import LocationAccessMiddleware
+        from .models import UserLocation
+        
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='TestPassword123!',
+            role='viewer'
+        )
+        self.location = Location.objects.create(name='Site A', created_by=self.user)
+        self.assignment = UserLocation.objects.create(user=self.user, location=self.location)
+        self.middleware = LocationAccessMiddleware(lambda request: 'ok')
+    
+    def _request(self):
+        from django.test import RequestFactory
+        request = RequestFactory().get(f'/api/facilities/locations/{self.location.id}/')
+        request.user = self.user
+        return request
+    
+    def test_assigned_location_allowed(self):
+        """Test access to an assigned location is allowed"""
+        self.assertEqual(self.middleware(self._request()), 'ok')
+    
+    def test_removed_assignment_denied(self):
+        """Test removing an assignment revokes access"""
+        self.middleware(self._request())
+        self.assignment.delete()
+        
+        response = self.middleware(self._request())
+        self.assertEqual(response.status_code, 403)
+    
+    def _bearer_request(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+        token = RefreshToken.for_user(self.user).access_token
+        request = RequestFactory().get(
+            f'/api/facilities/locations/{self.location.id}/',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        request.user = AnonymousUser()
+        return request
+    
+    def test_jwt_user_denied(self):
+        """Test a bearer-token user without the assignment is denied"""
+        self.assignment.delete()
+        
+        response = self.middleware(self._bearer_request())
+        self.assertEqual(response.status_code, 403)
+    
+    def test_jwt_result_reused_by_drf(self):
+        """Test DRF reuses the token authentication done by the middleware"""
+        from rest_framework.request import Request
+        from .authentication import RequestCachedJWTAuthentication
+        
+        request = self._bearer_request()
+        self.assertEqual(self.middleware(request), 'ok')
+        
+        with self.assertNumQueries(0):
+            user, _ = RequestCachedJWTAuthentication().authenticate(Request(request))
+        self.assertEqual(user, self.user)
+    
+    def test_invalid_token_left_to_drf(self):
+        """Test an invalid token passes the middleware and is rejected by DRF"""
+        from django.test import RequestFactory
+        from rest_framework.request import Request
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from .authentication import RequestCachedJWTAuthentication
+        
+        request = RequestFactory().get(
+            f'/api/facilities/locations/{self.location.id}/',
+            HTTP_AUTHORIZATION='Bearer not-a-token'
+        )
+        self.assertEqual(self.middleware(request), 'ok')
+        
+        with self.assertRaises(InvalidToken):
+            RequestCachedJWTAuthentication().authenticate(Request(request))
+
+
+class UnlockUserCommandTest(TestCase):
+    """Test the unlock_user management command"""
+    
+    def test_unlocks_multiple_users(self):
+        """Test several locked accounts are unlocked and logged together"""
+        locked = []
+        for name in ('first', 'second'):
+            user = User.objects.create_user(
+                username=name,
+                email=f'{name}@example.com',
+                password='TestPassword123!',
+                failed_login_attempts=5
+            )
+            user.lock_account()
+            locked.append(user)
+        
+        out = StringIO()
+        call_command('unlock_user', 'first', 'second', 'missing', stdout=out)
+        
+        for user in locked:
+            user.refresh_from_db()
+            self.assertFalse(user.is_account_locked())
+            self.assertEqual(user.failed_login_attempts, 0)
+        self.assertEqual(AuditLog.objects.filter(action='account_unlocked').count(), 2)
+        self.assertIn('User "missing" not found', out.getvalue())
+
+
+class CreateSampleUsersCommandTest(TestCase):
+    """Test the create_sample_users management command"""
+
+    def test_only_new_users_reported(self):
+        """Test a rerun reports and logs no users as created"""
+        call_command('create_sample_users', stdout=StringIO())
+        self.assertEqual(AuditLog.objects.filter(action='user_created').count(), 3)
+
+        out = StringIO()
+        call_command('create_sample_users', stdout=out)
+
+        self.assertEqual(AuditLog.objects.filter(action='user_created').count(), 3)
+        self.assertIn('No new sample users were created', out.getvalue())
+
+
+class CheckAdminAccessCommandTest(TestCase):
+    """Test the check_admin_access management command"""
+
+    def test_admin_with_organization(self):
+        """Test the report runs for an admin that has an organization"""
+        from facilities.models import Location
+        from .models import Organization
+
+        admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='AdminPassword123!',
+            role='admin',
+            organization=Organization.objects.create(name='Org')
+        )
+        Location.objects.create(name='Site A', created_by=admin)
+
+        out = StringIO()
+        call_command('check_admin_access', '--username', 'admin', stdout=out)
+
+        self.assertIn('Accessible Locations: 1', out.getvalue())
+        self.assertIn('Site A (Tanks: 0, Permits: 0)', out.getvalue())
+
+    def test_partial_report_written_on_error(self):
+        """Test sections collected before a failure are still written"""
+        from unittest import mock
+
+        User.objects.create_user(username='admin', password='AdminPassword123!', role='admin')
+
+        out = StringIO()
+        with mock.patch.object(User, 'get_permissions', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                call_command('check_admin_access', '--username', 'admin', stdout=out)
+
+        self.assertIn('USER INFORMATION', out.getvalue())
+
+
+class UserExpirationMiddlewareTest(TestCase):
+    """Test the UserExpirationMiddleware"""
+    
+    def setUp(self):
+        from django.test import RequestFactory
+        from .middleware import UserExpirationMiddleware
+        
+        self.factory = RequestFactory()
+        self.middleware = UserExpirationMiddleware(lambda request: 'ok')
+        self.user = User.objects.create_user(
+            username='temp',
+            email='temp@example.com',
+            password='TestPassword123!',
+            user_type='temporary',
+            expires_at=timezone.now() - timezone.timedelta(minutes=5)
+        )
+    
+    def test_expired_user_rejected_and_persisted(self):
+        """Test an expired temporary user is rejected and flagged once"""
+        request = self.factory.get('/api/auth/profile/')
+        request.user = self.user
+        
+        response = self.middleware(request)
+        self.assertEqual(response.status_code, 401)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_expired)
+        self.assertFalse(self.user.is_active)
+    
+    def test_expired_jwt_user_rejected(self):
+        """Test an expired temporary user is rejected when using a bearer token"""
+        from django.contrib.auth.models import AnonymousUser
+        
+        token = RefreshToken.for_user(self.user).access_token
+        request = self.factory.get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        request.user = AnonymousUser()
+        
+        response = self.middleware(request)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(request._cached_jwt_user, self.user)
+    
+    def test_health_check_skipped(self):
+        """Test health checks bypass the expiration check"""
+        request = self.factory.get('/api/health/')
+        request.user = self.user
+        
+        self.assertEqual(self.middleware(request), 'ok')
+
+
+class PruneSecurityLogsCommandTest(TestCase):
+    """Test the prune_security_logs management command"""
+    
+    def test_prunes_only_old_rows(self):
+        """Test rows past the retention period are deleted in batches"""
+        for _ in range(3):
+            AuditLog.objects.create(action='login', description='old')
+            LoginAttempt.objects.create(username='old', ip_address='127.0.0.1', success=False)
+        AuditLog.objects.filter(description='old').update(
+            timestamp=timezone.now() - timezone.timedelta(days=400)
+        )
+        LoginAttempt.objects.update(timestamp=timezone.now() - timezone.timedelta(days=100))
+        AuditLog.objects.create(action='login', description='recent')
+        
+        call_command('prune_security_logs', '--batch-size', '2', stdout=StringIO())
+        
+        self.assertEqual(list(AuditLog.objects.values_list('description', flat=True)), ['recent'])
+        self.assertFalse(LoginAttempt.objects.exists())
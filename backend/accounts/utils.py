@@ -32,6 +32,27 @@ def log_security_event(user, action, description, ip_address=None, user_agent=''
     )
 
 
+def build_security_event(user, action, description, ip_address=None, user_agent='', metadata=None):
+    """
+    Build an unsaved audit log entry for bulk_log_security_events
+    """
+    return AuditLog(
+        user=user,
+        action=action,
+        description=description,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        metadata=metadata or {}
+    )
+
+
+def bulk_log_security_events(events, batch_size=500):
+    """
+    Log several security-related events to audit log in a single INSERT
+    """
+    return AuditLog.objects.bulk_create(events, batch_size=batch_size)
+
+
 def log_login_attempt(username, ip_address, success, user_agent=''):
     """
     Log login attempt for monitoring
@@ -408,8 +408,8 @@ class TwoFactorDisableView(generics.GenericAPIView):
         user = request.user
         user.two_factor_enabled = False
         user.totp_secret = ''
-        user.backup_codes = []
-        user.save(update_fields=['two_factor_enabled', 'totp_secret', 'backup_codes'])
+        user.save(update_fields=['two_factor_enabled', 'totp_secret'])
+        user.backup_codes.all().delete()
         
         # Log 2FA disablement
         log_security_event(
@@ -477,15 +477,7 @@ class CreateUserView(generics.CreateAPIView):
 
                 # Assign locations to user
                 if location_ids:
-                    location_assignments = [
-                        UserLocation(
-                            user=user,
-                            location_id=loc_id,
-                            created_by=request.user
-                        )
-                        for loc_id in location_ids
-                    ]
-                    UserLocation.objects.bulk_create(location_assignments)
+                    UserLocation.assign_many(user, location_ids, created_by=request.user)
 
         except Exception as e:
             return Response(
@@ -530,7 +522,7 @@ class UserListView(generics.ListAPIView):
     
     def get_queryset(self):
         # CRITICAL FIX: Use the correct User model and ensure proper queryset
-        queryset = User.objects.all().order_by('-created_at')
+        queryset = User.objects.with_access_context().order_by('-created_at')
         return queryset
     
     def list(self, request, *args, **kwargs):
@@ -0,0 +1,8 @@
+"""
+Django settings for running the test suite
+Use with: python manage.py test --settings=facility_management.test_settings
+"""
+from .settings import *  # noqa: F401,F403
+
+# Test runs create users in nearly every setUp; a cheap hasher keeps the suite fast
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
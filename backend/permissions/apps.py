@@ -3,4 +3,13 @@ from django.apps import AppConfig
 
 class PermissionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'permissions'
\ No newline at end of file
+    name = 'permissions'
+    
+    def ready(self):
+        """
+        Import signal handlers when the app is ready
+        """
+        try:
+            import permissions.signals
+        except ImportError:
+            pass
@@ -1,11 +1,18 @@
 """
 Comprehensive RBAC models for permission management
 """
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
+# Permission sets change rarely. Writes invalidate the cache, but with the
+# default per-process LocMemCache only in the worker that made the write, so
+# other workers can serve old grants until the timeout expires. Configure a
+# shared CACHES backend to make invalidation apply to every worker.
+ROLE_PERMISSIONS_CACHE_TIMEOUT = 300
+
 
 class PermissionCategory(models.Model):
     """
@@ -65,6 +72,7 @@ class RolePermission(models.Model):
         ('contributor', 'Contributor'),
         ('viewer', 'Viewer'),
     ]
+    ROLE_VALUES = frozenset(value for value, _ in ROLE_CHOICES)
     
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     permission = models.ForeignKey(Permission, on_delete=models.CASCADE, related_name='role_permissions')
@@ -179,4 +187,36 @@ def check_user_permission(user, permission_code):
     elif user.role == 'viewer':
         return permission.viewer_default
     
-    return False
\ No newline at end of file
+    return False
+
+
+def _role_permissions_cache_key(role):
+    return f'role_perms:{role}'
+
+
+def get_role_permission_codes(role):
+    """
+    Get the permission codes granted to a role, cached across requests
+    The admin role resolves to every permission
+    """
+    key = _role_permissions_cache_key(role)
+    codes = cache.get(key)
+    if codes is None:
+        if role == 'admin':
+            codes = tuple(Permission.objects.values_list('code', flat=True))
+        else:
+            codes = tuple(RolePermission.objects.filter(
+                role=role,
+                is_granted=True
+            ).values_list('permission__code', flat=True))
+        cache.set(key, codes, ROLE_PERMISSIONS_CACHE_TIMEOUT)
+    return codes
+
+
+def invalidate_role_permission_codes():
+    """
+    Drop the cached permission codes for every role once the current
+    transaction commits, so a concurrent reader cannot re-cache the old rows
+    """
+    keys = [_role_permissions_cache_key(role) for role, _ in RolePermission.ROLE_CHOICES]
+    transaction.on_commit(lambda: cache.delete_many(keys))
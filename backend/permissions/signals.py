@@ -0,0 +1,17 @@
+"""
+Signal handlers for permissions app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Permission, RolePermission, invalidate_role_permission_codes
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def role_permissions_changed(sender, **kwargs):
+    """
+    Drop the cached role permission codes when a permission or grant changes
+    """
+    invalidate_role_permission_codes()
@@ -40,4 +40,26 @@ class PermissionModelTest(TestCase):
             is_granted=True
         )
         self.assertTrue(role_perm.is_granted)
-        self.assertEqual(role_perm.role, 'admin')
\ No newline at end of file
+        self.assertEqual(role_perm.role, 'admin')
+    
+    def test_role_permission_codes_invalidated(self):
+        """Test cached role permission codes follow grant changes"""
+        from django.core.cache import cache
+        from .models import get_role_permission_codes
+        
+        cache.clear()
+        self.assertEqual(get_role_permission_codes('viewer'), ())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            role_perm = RolePermission.objects.create(
+                role='viewer',
+                permission=self.permission,
+                is_granted=True
+            )
+            # Invalidation waits for the commit
+            self.assertEqual(get_role_permission_codes('viewer'), ())
+        self.assertEqual(get_role_permission_codes('viewer'), ('test_permission',))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            role_perm.delete()
+        self.assertEqual(get_role_permission_codes('viewer'), ())
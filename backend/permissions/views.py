@@ -76,10 +76,10 @@ def update_role_permission(request):
         )
 
     # Validate role value
-    valid_roles = ['admin', 'contributor', 'viewer']
-    if role not in valid_roles:
+    if role not in RolePermission.ROLE_VALUES:
+        valid_roles = ', '.join(value for value, _ in RolePermission.ROLE_CHOICES)
         return Response(
-            {'error': f'Invalid role. Must be one of: {", ".join(valid_roles)}', 'field': 'role'},
+            {'error': f'Invalid role. Must be one of: {valid_roles}', 'field': 'role'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
@@ -165,7 +165,7 @@ def bulk_update_permissions(request):
         updated_count = 0
         skipped_count = 0
         errors = []
-        valid_roles = ['admin', 'contributor', 'viewer']
+        valid_roles = ', '.join(value for value, _ in RolePermission.ROLE_CHOICES)
 
         with transaction.atomic():
             for idx, perm_data in enumerate(permissions_data):
@@ -192,8 +192,8 @@ def bulk_update_permissions(request):
                     continue
 
                 # Validate role value
-                if role not in valid_roles:
-                    errors.append(f'Item {idx}: Invalid role "{role}". Must be one of: {", ".join(valid_roles)}')
+                if role not in RolePermission.ROLE_VALUES:
+                    errors.append(f'Item {idx}: Invalid role "{role}". Must be one of: {valid_roles}')
                     continue
 
                 # Skip admin permissions